@@ -1,4 +1,5 @@
 import os
+import re
 import socket
 import threading
 
@@ -7,6 +8,28 @@ from . import exceptions
 from .container import Container
 from .volume import Layer, Storage, MetaStorage, VolumeLink, Volume
 
+MSG_NOSIGNAL = getattr(socket, 'MSG_NOSIGNAL', 0)
+PIPELINE_WINDOW = 64
+
+# mirrors TContainer::ValidLabel in portod, must match PORTO_LABEL_* and
+# PORTO_NAME_CHARS / PORTO_PATH_CHARS in src/common.hpp
+LABEL_NAME_MAX = 128
+LABEL_VALUE_MAX = 256
+LABEL_NAME_RE = re.compile(r'^(?!PORTO)[A-Z]{2,16}\.[a-zA-Z0-9_\-@:.]*\Z')
+LABEL_VALUE_RE = re.compile(r'^[a-zA-Z0-9_\-@:./]*\Z')
+
+
+def ValidateLabel(label, value=''):
+    """Check label locally, raises InvalidLabel as portod would"""
+    if len(label) > LABEL_NAME_MAX:
+        raise exceptions.InvalidLabel("Label name too long, max {} bytes".format(LABEL_NAME_MAX))
+    if len(value) > LABEL_VALUE_MAX:
+        raise exceptions.InvalidLabel("Label value too long, max {} bytes".format(LABEL_VALUE_MAX))
+    if not LABEL_NAME_RE.match(label):
+        raise exceptions.InvalidLabel("Invalid label name: {}".format(label))
+    if not LABEL_VALUE_RE.match(value):
+        raise exceptions.InvalidLabel("Invalid label value: {}".format(value))
+
 
 class Property(object):
     def __init__(self, name, desc, read_only, dynamic):
@@ -35,6 +58,7 @@ class PortoApi(object):
         self.socket_path = socket_path
         self.sock = None
         self.sock_pid = None
+        self.recv_buf = bytearray()
         self.timeout = timeout
         self.disk_timeout = disk_timeout
         self.auto_reconnect = auto_reconnect
@@ -62,6 +86,7 @@ class PortoApi(object):
             raise exceptions.SocketError("Porto connection error: {}".format(e))
 
         self.sock_pid = os.getpid()
+        self.recv_buf = bytearray()
         self._resend_async_wait()
 
     def _encode_message(self, msg, val, key=None):
@@ -106,6 +131,8 @@ class PortoApi(object):
     def _encode_request(self, request):
         req = request.SerializeToString()
         length = len(req)
+        if length <= 0x7f:
+            return bytearray((length,)) + req
         hdr = bytearray()
         while length > 0x7f:
             hdr.append(0x80 | (length & 0x7f))
@@ -114,12 +141,15 @@ class PortoApi(object):
         return hdr + req
 
     def _recv_data(self, count):
-        msg = bytearray()
-        while len(msg) < count:
-            chunk = self.sock.recv(count - len(msg))
+        buf = self.recv_buf
+        while len(buf) < count:
+            # read ahead: length prefix and following responses come in one recv
+            chunk = self.sock.recv(max(count - len(buf), 65536))
             if not chunk:
                 raise socket.error(socket.errno.ECONNRESET, os.strerror(socket.errno.ECONNRESET))
-            msg.extend(chunk)
+            buf.extend(chunk)
+        msg = buf[:count]
+        del buf[:count]
         return msg
 
     def _recv_response(self):
@@ -145,8 +175,28 @@ class PortoApi(object):
                 return rsp
 
     def _call(self, request, extra_timeout=0):
-        req = self._encode_request(request)
+        response = self._exchange(self._encode_request(request), 1, extra_timeout)[0]
+
+        if response.error != rpc.Success:
+            raise exceptions.PortoException.Create(response.error, response.errorMsg)
+
+        return response
 
+    def _call_many(self, requests):
+        """Pipeline requests in windows, portod stops reading while a response is unsent"""
+        responses = []
+        for i in range(0, len(requests), PIPELINE_WINDOW):
+            window = requests[i:i + PIPELINE_WINDOW]
+            req = b''.join(bytes(self._encode_request(request)) for request in window)
+            responses.extend(self._exchange(req, len(window), 0))
+
+        for response in responses:
+            if response.error != rpc.Success:
+                raise exceptions.PortoException.Create(response.error, response.errorMsg)
+
+        return responses
+
+    def _exchange(self, req, count, extra_timeout):
         with self.lock:
             if self.sock is None:
                 if self.auto_reconnect:
@@ -160,7 +210,7 @@ class PortoApi(object):
                     raise exceptions.SocketError("Porto socket connected by other pid {}".format(self.sock_pid))
             elif self.auto_reconnect:
                 try:
-                    self.sock.sendall(req)
+                    self.sock.sendall(req, MSG_NOSIGNAL)
                     req = None
                 except socket.timeout as e:
                     self.sock = None
@@ -170,12 +220,12 @@ class PortoApi(object):
 
             try:
                 if req is not None:
-                    self.sock.sendall(req)
+                    self.sock.sendall(req, MSG_NOSIGNAL)
 
                 if extra_timeout is None or extra_timeout > 0:
                     self._set_timeout(extra_timeout)
 
-                response = self._recv_response()
+                responses = [self._recv_response() for _ in range(count)]
 
                 if extra_timeout is None or extra_timeout > 0:
                     self._set_timeout()
@@ -187,10 +237,7 @@ class PortoApi(object):
                 self.sock = None
                 raise exceptions.SocketError("Socket error: {}".format(e))
 
-        if response.error != rpc.Success:
-            raise exceptions.PortoException.Create(response.error, response.errorMsg)
-
-        return response
+        return responses
 
     def _resend_async_wait(self):
         if not self.async_wait_names:
@@ -201,7 +248,7 @@ class PortoApi(object):
         if self.async_wait_timeout is not None:
             request.AsyncWait.timeout_ms = int(self.async_wait_timeout * 1000)
 
-        self.sock.sendall(self._encode_request(request))
+        self.sock.sendall(self._encode_request(request), MSG_NOSIGNAL)
         response = self._recv_response()
         if response.error != rpc.Success:
             raise exceptions.PortoException.Create(response.error, response.errorMsg)
@@ -215,6 +262,7 @@ class PortoApi(object):
             if self.sock is not None:
                 self.sock.close()
                 self.sock = None
+                self.recv_buf = bytearray()
 
     def Connected(self):
         with self.lock:
@@ -592,6 +640,17 @@ class PortoApi(object):
             req.SetLabel.state = state
         self._call(req)
 
+    def SetLabels(self, container, labels):
+        """Every label is attempted, the first error is raised after all"""
+        requests = []
+        for label, value in labels.items():
+            req = rpc.TPortoRequest()
+            req.SetLabel.name = str(container)
+            req.SetLabel.label = label
+            req.SetLabel.value = value
+            requests.append(req)
+        self._call_many(requests)
+
     def IncLabel(self, container, label, add=1):
         req = rpc.TPortoRequest()
         req.IncLabel.name = str(container)
@@ -728,6 +787,17 @@ class PortoApi(object):
             req.SetVolumeLabel.prev_value = prev_value
         self._call(req).SetVolumeLabel.prev_value
 
+    def SetVolumeLabels(self, path, labels):
+        """Every label is attempted, the first error is raised after all"""
+        requests = []
+        for label, value in labels.items():
+            req = rpc.TPortoRequest()
+            req.SetVolumeLabel.path = path
+            req.SetVolumeLabel.label = label
+            req.SetVolumeLabel.value = value
+            requests.append(req)
+        self._call_many(requests)
+
     def ImportLayer(self, layer, tarball, place=None, private_value=None, timeout=None):
         request = rpc.TPortoRequest()
         request.ImportLayer.layer = layer
@@ -68,6 +68,9 @@ class Container(object):
     def SetLabel(self, label, value, prev_value=None):
         self.api.SetLabel(self.name, label, value, prev_value)
 
+    def SetLabels(self, labels):
+        self.api.SetLabels(self.name, labels)
+
     def IncLabel(self, label, add=1):
         return self.api.IncLabel(self.name, label, add)
 
@@ -1,34 +1,213 @@
-from . import rpc_pb2
+# Error classes must match enum EError in rpc.proto, setup.py checks that.
 
 
 class PortoException(Exception):
     EID = None
-    __TYPES__ = {}
-
-    @classmethod
-    def _Init(cls):
-        for eid, err in rpc_pb2._EERROR.values_by_number.items():
-            e_class = type(err.name, (cls,), {'EID': eid})
-            cls.__TYPES__[eid] = e_class
-            globals()[err.name] = e_class
 
     @classmethod
     def Create(cls, eid, msg):
-        e_class = cls.__TYPES__.get(eid)
-        if e_class is not None:
-            return e_class(msg)
-        return UnknownError(msg)
+        if 0 <= eid < len(cls._TYPES_LIST):
+            return cls._TYPES_LIST[eid](msg)
+        return cls._UNKNOWN(msg)
 
     def __str__(self):
-        return '%s: %s' % (self.__class__.__name__, ', '.join(self.args))
+        return '%s: %s' % (type(self).__name__, ', '.join(self.args))
+
+
+class Success(PortoException):
+    EID = 0
+
+
+class Unknown(PortoException):
+    EID = 1
+
+
+class InvalidMethod(PortoException):
+    EID = 2
+
+
+class ContainerAlreadyExists(PortoException):
+    EID = 3
+
+
+class ContainerDoesNotExist(PortoException):
+    EID = 4
+
+
+class InvalidProperty(PortoException):
+    EID = 5
+
+
+class InvalidData(PortoException):
+    EID = 6
+
+
+class InvalidValue(PortoException):
+    EID = 7
+
+
+class InvalidState(PortoException):
+    EID = 8
+
+
+class NotSupported(PortoException):
+    EID = 9
+
+
+class ResourceNotAvailable(PortoException):
+    EID = 10
+
+
+class Permission(PortoException):
+    EID = 11
+
+
+class VolumeAlreadyExists(PortoException):
+    EID = 12
+
+
+class VolumeNotFound(PortoException):
+    EID = 13
+
+
+class NoSpace(PortoException):
+    EID = 14
+
+
+class Busy(PortoException):
+    EID = 15
+
+
+class VolumeAlreadyLinked(PortoException):
+    EID = 16
+
+
+class VolumeNotLinked(PortoException):
+    EID = 17
+
+
+class LayerAlreadyExists(PortoException):
+    EID = 18
+
+
+class LayerNotFound(PortoException):
+    EID = 19
+
+
+class NoValue(PortoException):
+    EID = 20
+
+
+class VolumeNotReady(PortoException):
+    EID = 21
+
+
+class InvalidCommand(PortoException):
+    EID = 22
+
+
+class LostError(PortoException):
+    EID = 23
+
+
+class DeviceNotFound(PortoException):
+    EID = 24
+
+
+class InvalidPath(PortoException):
+    EID = 25
+
+
+class InvalidNetworkAddress(PortoException):
+    EID = 26
+
+
+class PortoFrozen(PortoException):
+    EID = 27
+
+
+class LabelNotFound(PortoException):
+    EID = 28
+
+
+class InvalidLabel(PortoException):
+    EID = 29
+
+
+class NotFound(PortoException):
+    EID = 404
+
+
+class SocketError(PortoException):
+    EID = 502
+
+
+class SocketUnavailable(PortoException):
+    EID = 503
+
+
+class SocketTimeout(PortoException):
+    EID = 504
+
+
+class Taint(PortoException):
+    EID = 666
+
+
+class Queued(PortoException):
+    EID = 1000
 
 
 class WaitContainerTimeout(PortoException):
     pass
 
 
-PortoException._Init()
+PortoException.__TYPES__ = {
+    0: Success,
+    1: Unknown,
+    2: InvalidMethod,
+    3: ContainerAlreadyExists,
+    4: ContainerDoesNotExist,
+    5: InvalidProperty,
+    6: InvalidData,
+    7: InvalidValue,
+    8: InvalidState,
+    9: NotSupported,
+    10: ResourceNotAvailable,
+    11: Permission,
+    12: VolumeAlreadyExists,
+    13: VolumeNotFound,
+    14: NoSpace,
+    15: Busy,
+    16: VolumeAlreadyLinked,
+    17: VolumeNotLinked,
+    18: LayerAlreadyExists,
+    19: LayerNotFound,
+    20: NoValue,
+    21: VolumeNotReady,
+    22: InvalidCommand,
+    23: LostError,
+    24: DeviceNotFound,
+    25: InvalidPath,
+    26: InvalidNetworkAddress,
+    27: PortoFrozen,
+    28: LabelNotFound,
+    29: InvalidLabel,
+    404: NotFound,
+    502: SocketError,
+    503: SocketUnavailable,
+    504: SocketTimeout,
+    666: Taint,
+    1000: Queued,
+}
+
+PortoException._UNKNOWN = Unknown
+PortoException._TYPES_LIST = [Unknown] * (max(PortoException.__TYPES__) + 1)
+for _eid, _e_class in PortoException.__TYPES__.items():
+    assert _e_class.EID == _eid, "{}.EID does not match __TYPES__ key {}".format(_e_class.__name__, _eid)
+    PortoException._TYPES_LIST[_eid] = _e_class
+del _eid, _e_class
 
 EError = PortoException
-PermissionError = Permission  # noqa UnresolvedReference
-UnknownError = Unknown  # noqa UnresolvedReference
+PermissionError = Permission
+UnknownError = Unknown
@@ -252,6 +252,9 @@ class Volume(object):
     def SetLabel(self, label, value, prev_value=None):
         return self.api.SetVolumeLabel(self.path, label, value, prev_value)
 
+    def SetLabels(self, labels):
+        self.api.SetVolumeLabels(self.path, labels)
+
     def Export(self, tarball, compress=None, timeout=None):
         self.api.ExportLayer(self.path, place=self.place, tarball=tarball, compress=compress, timeout=timeout)
 
@@ -12,6 +12,20 @@ def version():
             return re.search(r'.*\((.*)\).*', f.readline()).group(1)
     return "0.0.0"
 
+def check_errors(proto, module):
+    with open(proto) as f:
+        body = re.search(r'enum EError \{(.*?)\}', f.read(), re.S).group(1)
+    errors = re.findall(r'^\s*(\w+)\s*=\s*(\d+)\s*;', body, re.M)
+    with open(module) as f:
+        source = f.read()
+    types = re.search(r'__TYPES__ = \{(.*?)\}', source, re.S).group(1)
+    classes = re.findall(r'^\s*(\d+)\s*:\s*(\w+)\s*,', types, re.M)
+    eids = dict(re.findall(r'^class (\w+)\(PortoException\):\n(?:[ \t]+.*\n|\n)*?[ \t]+EID = (\d+)', source, re.M))
+    if sorted((name, int(eid)) for name, eid in errors) != sorted((name, int(eid)) for eid, name in classes) or \
+            any(eids.get(name) != eid for eid, name in classes):
+        sys.stderr.write("{} does not match EError in {}\n".format(module, proto))
+        sys.exit(-1)
+
 def readme():
     with open('README.rst') as f:
         return f.read()
@@ -32,6 +46,8 @@ if __name__ == '__main__':
         sys.stderr.write("Compiled rpc.proto not found\n")
         sys.exit(-1)
 
+    check_errors("porto/rpc.proto", "porto/exceptions.py")
+
     setup(name='portopy',
           version=version(),
           description='Python API for porto',
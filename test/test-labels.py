@@ -3,50 +3,68 @@
 import os
 import time
 import porto
+from porto.exceptions import Busy, InvalidLabel, InvalidValue, LabelNotFound, ResourceNotAvailable, WaitContainerTimeout
 from test_common import *
 
+many_labels = ['TEST.' + str(i) for i in range(100)]
+wide_label = 'A' * 16 + '.a'
+long_label = 'A' * 16 + '.' + 'a' * 111
+
+# (label, value, also sent to portod): keep one portod case per check in TContainer::ValidLabel
+invalid_labels = [
+    ('!', '.', True),
+    ('TEST.!', '.', True),
+    ('TEST./', '.', False),     # same check as 'TEST.!'
+    ('a', '.', False),          # same check as '!'
+    ('a.a', '.', True),
+    ('A.a', '.', True),
+    ('A' * 17 + '.a', '.', True),
+    ('AAAAAAAA.' + 'a' * 150, '.', True),
+    ('AAAAAAAA.a', ' ', True),
+    ('AAAAAAAA.a', 'a' * 300, True),
+    ('PORTO.a', '.', True),
+]
+
 c = porto.Connection()
+c.Connect()
+c.SetAutoReconnect(False)
 
 a = c.Run('a')
 
 ExpectProp(a, 'labels', '')
 
-ExpectEq(Catch(c.SetLabel, 'a', '!', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'TEST.!', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'TEST./', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'a', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'a.a', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'A.a', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'A' * 17 + '.a', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'AAAAAAAA.' + 'a' * 150, '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'AAAAAAAA.a', ' '), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'AAAAAAAA.a', 'a' * 300), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(c.SetLabel, 'a', 'PORTO.a', '.'), porto.exceptions.InvalidLabel)
+for label, value, _ in invalid_labels:
+    ExpectEq(Catch(porto.api.ValidateLabel, label, value), InvalidLabel)
+
+ExpectEq(Catch(porto.api.ValidateLabel, wide_label, '/'), None)
+ExpectEq(Catch(porto.api.ValidateLabel, long_label, '.'), None)
+
+for label, value, portod in invalid_labels:
+    if portod:
+        ExpectEq(Catch(c.SetLabel, 'a', label, value), InvalidLabel)
 
-c.SetLabel('a', 'A' * 16 + '.a', '/')
-c.SetLabel('a', 'A' * 16 + '.a', '.')
-c.SetLabel('a', 'A' * 16 + '.a', '')
+c.SetLabel('a', wide_label, '/')
+c.SetLabel('a', wide_label, '.')
+c.SetLabel('a', wide_label, '')
 
-c.SetLabel('a', 'A' * 16 + '.' + 'a' * 111, '.')
-c.SetLabel('a', 'A' * 16 + '.' + 'a' * 111, '')
+c.SetLabel('a', long_label, '.')
+c.SetLabel('a', long_label, '')
 
-for i in range(100):
-    c.SetLabel('a', 'TEST.' + str(i), '.')
+c.SetLabels('a', dict.fromkeys(many_labels, '.'))
 
-ExpectEq(Catch(c.SetLabel, 'a', 'TEST.a', '.'), porto.exceptions.ResourceNotAvailable)
+ExpectEq(Catch(c.SetLabel, 'a', 'TEST.a', '.'), ResourceNotAvailable)
 
-for i in range(100):
-    c.SetLabel('a', 'TEST.' + str(i), '')
+c.SetLabels('a', dict.fromkeys(many_labels, ''))
 
 ExpectProp(a, 'labels', '')
 
-ExpectEq(Catch(a.GetLabel, 'TEST.a'), porto.exceptions.LabelNotFound)
+ExpectEq(Catch(a.GetLabel, 'TEST.a'), LabelNotFound)
 ExpectProp(a, 'labels', '')
-ExpectEq(Catch(a.GetProperty, 'TEST.a'), porto.exceptions.LabelNotFound)
-ExpectEq(Catch(a.GetProperty, 'labels[TEST.a]'), porto.exceptions.LabelNotFound)
+ExpectEq(Catch(a.GetProperty, 'TEST.a'), LabelNotFound)
+ExpectEq(Catch(a.GetProperty, 'labels[TEST.a]'), LabelNotFound)
 ExpectEq(c.FindLabel('TEST.a'), [])
-ExpectEq(Catch(c.WaitLabels, ['***'], ['TEST.*'], timeout=0), porto.exceptions.WaitContainerTimeout)
-ExpectEq(Catch(c.WaitLabels, ['a'], ['TEST.*'], timeout=0), porto.exceptions.WaitContainerTimeout)
+ExpectEq(Catch(c.WaitLabels, ['***'], ['TEST.*'], timeout=0), WaitContainerTimeout)
+ExpectEq(Catch(c.WaitLabels, ['a'], ['TEST.*'], timeout=0), WaitContainerTimeout)
 
 c.SetLabel('a', 'TEST.a', '.')
 ExpectEq(a.GetLabel('TEST.a'), '.')
@@ -72,12 +90,12 @@ ExpectEq(c.FindLabel('TEST.a*', mask="a*", state="meta", value="."), [{'name':'a
 
 c.SetLabel('a', 'TEST.a', '')
 ExpectProp(a, 'labels', '')
-ExpectEq(Catch(a.GetProperty, 'TEST.a'), porto.exceptions.LabelNotFound)
-ExpectEq(Catch(a.GetProperty, 'labels[TEST.a]'), porto.exceptions.LabelNotFound)
+ExpectEq(Catch(a.GetProperty, 'TEST.a'), LabelNotFound)
+ExpectEq(Catch(a.GetProperty, 'labels[TEST.a]'), LabelNotFound)
 ExpectEq(c.FindLabel('TEST.a'), [])
-ExpectEq(Catch(c.WaitLabels, ['***'], ['TEST.*'], timeout=0), porto.exceptions.WaitContainerTimeout)
+ExpectEq(Catch(c.WaitLabels, ['***'], ['TEST.*'], timeout=0), WaitContainerTimeout)
 
-ExpectEq(Catch(a.SetLabel, 'TEST.a', '.', 'N'), porto.exceptions.LabelNotFound)
+ExpectEq(Catch(a.SetLabel, 'TEST.a', '.', 'N'), LabelNotFound)
 
 a.SetLabel('TEST.a', 'N', '')
 ExpectProp(a, 'TEST.a', 'N')
@@ -85,31 +103,31 @@ ExpectProp(a, 'TEST.a', 'N')
 a.SetLabel('TEST.a', 'Y', 'N')
 ExpectProp(a, 'TEST.a', 'Y')
 
-ExpectEq(Catch(a.SetLabel, 'TEST.a', 'Y', 'N'), porto.exceptions.Busy)
+ExpectEq(Catch(a.SetLabel, 'TEST.a', 'Y', 'N'), Busy)
 ExpectProp(a, 'TEST.a', 'Y')
 
 a.SetLabel('TEST.a', '', 'Y')
-ExpectEq(Catch(a.GetProperty, 'TEST.a'), porto.exceptions.LabelNotFound)
+ExpectEq(Catch(a.GetProperty, 'TEST.a'), LabelNotFound)
 
 
-ExpectEq(Catch(a.IncLabel, 'TEST.a', add=0), porto.exceptions.LabelNotFound)
+ExpectEq(Catch(a.IncLabel, 'TEST.a', add=0), LabelNotFound)
 a.SetLabel('TEST.a', 'a')
-ExpectEq(Catch(a.IncLabel, 'TEST.a'), porto.exceptions.InvalidValue)
+ExpectEq(Catch(a.IncLabel, 'TEST.a'), InvalidValue)
 a.SetLabel('TEST.a', '')
 ExpectEq(a.IncLabel('TEST.a'), 1)
 ExpectEq(a.IncLabel('TEST.a', 2), 3)
 ExpectEq(a.IncLabel('TEST.a', -2), 1)
-ExpectEq(Catch(a.IncLabel, 'TEST.a', 2**63-1), porto.exceptions.InvalidValue)
+ExpectEq(Catch(a.IncLabel, 'TEST.a', 2**63-1), InvalidValue)
 ExpectEq(a.IncLabel('TEST.a', 2**63-2), 2**63-1)
 ExpectEq(a.IncLabel('TEST.a', -(2**63-1)), 0)
 ExpectEq(a.IncLabel('TEST.a', -1), -1)
-ExpectEq(Catch(a.IncLabel, 'TEST.a', -(2**63)), porto.exceptions.InvalidValue)
+ExpectEq(Catch(a.IncLabel, 'TEST.a', -(2**63)), InvalidValue)
 ExpectEq(a.IncLabel('TEST.a', 1), 0)
 ExpectEq(a.IncLabel('TEST.a', -(2**63)), -(2**63))
 a.SetLabel('TEST.a', str(2**64))
-ExpectEq(Catch(a.IncLabel, 'TEST.a', -1), porto.exceptions.InvalidValue)
+ExpectEq(Catch(a.IncLabel, 'TEST.a', -1), InvalidValue)
 a.SetLabel('TEST.a', str(-(2**64)))
-ExpectEq(Catch(a.IncLabel, 'TEST.a', 1), porto.exceptions.InvalidValue)
+ExpectEq(Catch(a.IncLabel, 'TEST.a', 1), InvalidValue)
 a.SetLabel('TEST.a', '')
 
 
@@ -123,9 +141,9 @@ ExpectProp(b, '.TEST.a', 'a')
 ExpectProp(b, 'TEST.b', 'b')
 ExpectEq(b.GetLabel('.TEST.a'), 'a')
 
-ExpectEq(Catch(b.GetProperty, 'TEST.a'), porto.exceptions.LabelNotFound)
-ExpectEq(Catch(a.GetProperty, 'TEST.b'), porto.exceptions.LabelNotFound)
-ExpectEq(Catch(a.GetProperty, '.TEST.b'), porto.exceptions.LabelNotFound)
+ExpectEq(Catch(b.GetProperty, 'TEST.a'), LabelNotFound)
+ExpectEq(Catch(a.GetProperty, 'TEST.b'), LabelNotFound)
+ExpectEq(Catch(a.GetProperty, '.TEST.b'), LabelNotFound)
 
 ExpectEq(c.FindLabel('TEST.a'), [{'name':'a', 'label':'TEST.a', 'value':'a', 'state':'meta'}])
 ExpectEq(c.FindLabel('.TEST.a'), [{'name':'a', 'label':'.TEST.a', 'value':'a', 'state':'meta'}, {'name':'a/b', 'label':'.TEST.a', 'value':'a', 'state':'meta'}])
@@ -145,43 +163,35 @@ ExpectEq(v.GetLabel('TEST.a'), 'a')
 ExpectEq(v.GetLabel('TEST.b'), 'b')
 ExpectEq(len(c.GetVolumes(labels=['TEST.a'])), 1)
 ExpectEq(len(c.GetVolumes(labels=['TEST.b'])), 1)
+c.SetAutoReconnect(True)
 ReloadPortod()
 ExpectEq(v.GetProperty('labels'), 'TEST.a: a; TEST.b: b')
+c.SetAutoReconnect(False)
 v.Destroy()
 
 v = c.CreateVolume()
 
 ExpectEq(v.GetProperty('labels'), '')
 
-ExpectEq(Catch(v.SetLabel, '!', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'TEST.!', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'TEST./', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'a', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'a.a', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'A.a', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'A' * 17 + '.a', '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'AAAAAAAA.' + 'a' * 150, '.'), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'AAAAAAAA.a', ' '), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'AAAAAAAA.a', 'a' * 300), porto.exceptions.InvalidLabel)
-ExpectEq(Catch(v.SetLabel, 'PORTO.a', '.'), porto.exceptions.InvalidLabel)
+for label, value, portod in invalid_labels:
+    if portod:
+        ExpectEq(Catch(v.SetLabel, label, value), InvalidLabel)
 
-v.SetLabel('A' * 16 + '.a', '.')
-v.SetLabel('A' * 16 + '.a', '')
+v.SetLabel(wide_label, '.')
+v.SetLabel(wide_label, '')
 
-v.SetLabel('A' * 16 + '.' + 'a' * 111, '.')
-v.SetLabel('A' * 16 + '.' + 'a' * 111, '')
+v.SetLabel(long_label, '.')
+v.SetLabel(long_label, '')
 
-for i in range(100):
-    v.SetLabel('TEST.' + str(i), '.')
+v.SetLabels(dict.fromkeys(many_labels, '.'))
 
-ExpectEq(Catch(v.SetLabel, 'TEST.a', '.'), porto.exceptions.ResourceNotAvailable)
+ExpectEq(Catch(v.SetLabel, 'TEST.a', '.'), ResourceNotAvailable)
 
-for i in range(100):
-    v.SetLabel('TEST.' + str(i), '')
+v.SetLabels(dict.fromkeys(many_labels, ''))
 
 ExpectEq(v.GetProperty('labels'), '')
 
-ExpectEq(Catch(v.GetLabel, 'TEST.a'), porto.exceptions.LabelNotFound)
+ExpectEq(Catch(v.GetLabel, 'TEST.a'), LabelNotFound)
 
 c.SetVolumeLabel(v.path, 'TEST.a', '/')
 ExpectEq(v.GetLabel('TEST.a'), '/')